@@ -1,12 +1,27 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import calendar
+import io
 import os
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 
-def load_config():
-    """Load configuration from config.yaml"""
+# libyaml's C loader when available, it is much faster than the pure Python one
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def parse_config(config_path):
+    """Parse a config file"""
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+
+def find_config():
+    """Locate config.yaml, returning its path and mtime or None"""
     config_paths = [
         "/app/config.yaml",  # Docker path
         "../config.yaml",    # Relative path for local development
@@ -14,16 +29,18 @@ def load_config():
     ]
 
     for config_path in config_paths:
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+        try:
+            return config_path, os.path.getmtime(config_path)
+        except OSError:
+            continue
 
     return None
 
 
-def get_itinerary_metadata():
-    """Load itinerary metadata from config.yaml"""
-    config = load_config()
+@st.cache_resource(max_entries=1)
+def build_itinerary_metadata(config_path, mtime):
+    """Map output files to itinerary metadata, ``mtime`` keys the shared read-only cache"""
+    config = parse_config(config_path)
     if not config or 'itineraries' not in config:
         return {}
 
@@ -41,38 +58,178 @@ def get_itinerary_metadata():
     return metadata
 
 
-def load_commute_time(file):
-    df = pd.read_csv(file, names=["datetime", "commute_time"])
-    df_dt = pd.to_datetime(df["datetime"], utc=True)
-    df_dt = df_dt.dt.tz_convert("US/Eastern")
-
-    df = df[df_dt.dt.minute.isin([0, 30])]
-    df["hour_min"] = df_dt.dt.strftime("%H:%M")
-    df_weekday_nbr = df_dt.dt.weekday + 1
-    df_weekday_name = df_dt.dt.day_name()
-    df["weekday"] = df_weekday_nbr.astype(str) + " - " + df_weekday_name
+def get_itinerary_metadata():
+    """Load itinerary metadata from config.yaml"""
+    config_file = find_config()
+    if config_file is None:
+        return {}
+
+    return build_itinerary_metadata(*config_file)
+
+
+CSV_COLUMNS = ["datetime", "commute_time"]
+
+# Trailing bytes kept to check a cached CSV was only appended to
+CSV_TAIL_BYTES = 64
+
+WEEKDAY_LABELS = [f"{i} - {name}" for i, name in enumerate(calendar.day_name, start=1)]
+
+# "HH:MM" label of every half-hour bucket, indexed by minutes since midnight // 30
+HOUR_MIN_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(0, 24 * 60, 30)])
+
+# Summary grids are (count, sum, sum of squares) x weekday x half hour
+SUMMARY_SHAPE = (3, len(WEEKDAY_LABELS), len(HOUR_MIN_LABELS))
+
+
+@st.cache_resource
+def get_csv_cache():
+    """Parsed CSV files shared across reruns, keyed by path"""
+    return {}
+
+
+def parse_commute_time(buffer):
+    """Parse raw CSV rows into the commute time DataFrame"""
+    df = pd.read_csv(
+        buffer, names=CSV_COLUMNS, engine="pyarrow", dtype={"commute_time": "float32"}
+    )
+    # Arrow parses the fetcher's RFC 3339 timestamps into UTC datetimes
+    df_dt = df["datetime"]
+
+    # US/Eastern offsets are whole hours, so the minute can be filtered on
+    # before converting, and only the kept rows go through the conversion
+    # 0 and 30 are the only minutes divisible by 30
+    mask = df_dt.dt.minute.to_numpy() % 30 == 0
+    df = df[mask].copy()
+    df_dt = df_dt[mask].dt.tz_convert("US/Eastern")
+    df["datetime"] = df_dt
+    df["hm_bucket"] = (df_dt.dt.hour * 60 + df_dt.dt.minute).astype("int16")
+    df["weekday"] = pd.Categorical.from_codes(
+        df_dt.dt.weekday.values, categories=WEEKDAY_LABELS, ordered=True
+    )
     return df
 
 
-def get_average_commute_time(df: pd.DataFrame):
-    avg_time = df.groupby("hour_min")["commute_time"].mean()
-    avg_time = avg_time.reset_index()
+def summarize_commute_time(df: pd.DataFrame):
+    """Sufficient statistics (count, sum, sum of squares) per weekday and half hour"""
+    commute_time = df["commute_time"].to_numpy(dtype=np.float64)
+    weekday = df["weekday"].cat.codes.to_numpy().astype(np.intp)
+    half_hour = df["hm_bucket"].to_numpy() // 30
+
+    # Flat index into the weekday x half hour grid, accumulated in one pass each
+    key = weekday * SUMMARY_SHAPE[2] + half_hour
+    size = SUMMARY_SHAPE[1] * SUMMARY_SHAPE[2]
+    summary = np.stack([
+        np.bincount(key, minlength=size),
+        np.bincount(key, weights=commute_time, minlength=size),
+        np.bincount(key, weights=commute_time ** 2, minlength=size),
+    ])
+    return summary.reshape(SUMMARY_SHAPE)
+
+
+def load_commute_time(file):
+    """Load a commute time CSV with its summary and (min, max) commute time
+
+    Only rows appended since the last call are parsed.
+    """
+    cache = get_csv_cache()
+    stat = os.stat(file)
+    identity = (stat.st_dev, stat.st_ino)
+    cached_identity, offset, tail, df, summary, extremes = cache.get(
+        file, (identity, 0, b"", None, np.zeros(SUMMARY_SHAPE), (np.inf, -np.inf))
+    )
+
+    # File was replaced or truncated, start over
+    if cached_identity != identity or stat.st_size < offset:
+        offset, tail, df = 0, b"", None
+        summary, extremes = np.zeros(SUMMARY_SHAPE), (np.inf, -np.inf)
+
+    if stat.st_size > offset:
+        with open(file, 'rb') as f:
+            # The bytes before the offset must still be the last rows read,
+            # otherwise the file was rewritten in place (or its inode reused)
+            if offset:
+                f.seek(offset - len(tail))
+                if f.read(len(tail)) != tail:
+                    offset, tail, df = 0, b"", None
+                    summary, extremes = np.zeros(SUMMARY_SHAPE), (np.inf, -np.inf)
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+
+        # Leave a partially written last row for the next call
+        end = data.rfind(b"\n") + 1
+        if end:
+            try:
+                new_df = parse_commute_time(io.BytesIO(data[:end]))
+            except Exception:
+                # Never resume from an offset that failed to parse, the next
+                # call reads the whole file again
+                cache.pop(file, None)
+                raise
+            if df is None:
+                df = new_df.reset_index(drop=True)
+            else:
+                df = pd.concat([df, new_df], ignore_index=True)
+            summary = summary + summarize_commute_time(new_df)
+            if len(new_df):
+                extremes = (
+                    min(extremes[0], new_df["commute_time"].min()),
+                    max(extremes[1], new_df["commute_time"].max()),
+                )
+            tail = (tail + data[:end])[-CSV_TAIL_BYTES:]
+            cache[file] = (identity, offset + end, tail, df, summary, extremes)
+
+    if df is None:
+        return pd.DataFrame(columns=CSV_COLUMNS), summary, extremes
+    return df, summary, extremes
+
+
+def get_average_commute_time(summary: np.ndarray):
+    count, total, sumsq = summary.sum(axis=1)
+    observed = count > 0
+    count, total, sumsq = count[observed], total[observed], sumsq[observed]
+
+    mean = total / count
+    # Sample variance, like DataFrame.std(), undefined for a single sample
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (sumsq - total * mean) / (count - 1)
+    avg_time = pd.DataFrame({
+        "hour_min": HOUR_MIN_LABELS[observed],
+        "commute_time": mean,
+        "+/-": np.sqrt(np.clip(var, 0, None)),
+    })
     return avg_time
 
 
-def get_average_commute_time_daywise(df: pd.DataFrame):
-    avg_time_daywise = df.groupby(["weekday", "hour_min"])["commute_time"].mean()
-    avg_time_daywise = avg_time_daywise.reset_index()
+def get_average_commute_time_daywise(summary: np.ndarray):
+    count, total, _ = summary
+    weekday, half_hour = np.nonzero(count)
+    avg_time_daywise = pd.DataFrame({
+        "weekday": pd.Categorical.from_codes(weekday, categories=WEEKDAY_LABELS, ordered=True),
+        "hour_min": HOUR_MIN_LABELS[half_hour],
+        "commute_time": total[weekday, half_hour] / count[weekday, half_hour],
+    })
     return avg_time_daywise
 
 
+def get_commute_time_stats(summary: np.ndarray, extremes):
+    """Overall mean, min and max commute time"""
+    # The mean comes from the same sufficient statistics as the charts
+    count, total, _ = summary.sum(axis=(1, 2))
+    return {"mean": total / count, "min": extremes[0], "max": extremes[1]}
+
+
 def get_all_csv_files():
     """Get all CSV files from the data directory"""
     data_dir = "data"
-    if not os.path.exists(data_dir):
+    try:
+        with os.scandir(data_dir) as entries:
+            csv_files = [
+                entry.name for entry in entries
+                if entry.name.endswith('.csv') and entry.is_file()
+            ]
+    except FileNotFoundError:
         return []
 
-    csv_files = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
     return csv_files
 
 
@@ -95,10 +252,8 @@ def order_csv_files_by_config(csv_files, metadata):
     return [f[0] for f in files_with_keys]
 
 
-def display_itinerary(csv_file, metadata):
-    """Display a single itinerary's data"""
-    file_path = f"data/{csv_file}"
-
+def display_itinerary(csv_file, metadata, commute_time):
+    """Display a single itinerary's data, ``commute_time`` is the pending load_commute_time call"""
     # Get metadata for this file
     file_metadata = metadata.get(csv_file, {
         'id': csv_file.replace('.csv', ''),
@@ -120,18 +275,20 @@ def display_itinerary(csv_file, metadata):
 
     # Load and display data
     try:
-        df = load_commute_time(file_path)
+        df, summary, extremes = commute_time.result()
 
         if len(df) == 0:
             st.warning("No data available for this itinerary yet.")
             return
 
+        avg_time = get_average_commute_time(summary)
+        avg_time_daywise = get_average_commute_time_daywise(summary)
+        stats = get_commute_time_stats(summary, extremes)
+
         # Average commute time
         st.markdown("#### Average commute time")
-        adf = get_average_commute_time(df)
-        adf["+/-"] = df.groupby("hour_min")["commute_time"].std().values
         st.bar_chart(
-            adf,
+            avg_time,
             x="hour_min",
             y="commute_time",
             x_label="Departure time (HH:MM)",
@@ -142,17 +299,16 @@ def display_itinerary(csv_file, metadata):
         # Statistics
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Average", f"{df['commute_time'].mean():.1f} min")
+            st.metric("Average", f"{stats['mean']:.1f} min")
         with col2:
-            st.metric("Min", f"{df['commute_time'].min():.1f} min")
+            st.metric("Min", f"{stats['min']:.1f} min")
         with col3:
-            st.metric("Max", f"{df['commute_time'].max():.1f} min")
+            st.metric("Max", f"{stats['max']:.1f} min")
 
         # Day-wise breakdown
         st.markdown("#### Day-wise average commute time")
-        adf = get_average_commute_time_daywise(df)
         st.bar_chart(
-            adf,
+            avg_time_daywise,
             x="hour_min",
             y="commute_time",
             x_label="Departure time (HH:MM)",
@@ -161,9 +317,11 @@ def display_itinerary(csv_file, metadata):
             color="weekday",
         )
 
-        # Show raw data option
-        with st.expander(f"📊 Show raw data ({len(df)} records)"):
-            st.dataframe(df, use_container_width=True)
+        # Show raw data option, only sent to the browser when asked for
+        if st.toggle(f"📊 Show raw data ({len(df)} records)", key=f"raw-{csv_file}"):
+            raw_df = df.drop(columns="hm_bucket")
+            raw_df.insert(2, "hour_min", HOUR_MIN_LABELS[df["hm_bucket"].to_numpy() // 30])
+            st.dataframe(raw_df, use_container_width=True)
 
     except FileNotFoundError:
         st.error(f"Data file not found: {csv_file}")
@@ -207,6 +365,18 @@ if __name__ == "__main__":
 
     tabs = st.tabs(tab_labels)
 
-    for i, csv_file in enumerate(csv_files):
-        with tabs[i]:
-            display_itinerary(csv_file, metadata)
+    # Parse every itinerary concurrently, each tab waits only on its own file.
+    # Workers share this run's context so they can reach the Streamlit caches.
+    with ThreadPoolExecutor(
+        max_workers=min(8, len(csv_files)),
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx()),
+    ) as executor:
+        commute_times = {
+            csv_file: executor.submit(load_commute_time, f"data/{csv_file}")
+            for csv_file in csv_files
+        }
+
+        for i, csv_file in enumerate(csv_files):
+            with tabs[i]:
+                display_itinerary(csv_file, metadata, commute_times[csv_file])